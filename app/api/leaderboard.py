@@ -1,31 +1,113 @@
 """Leaderboard API routes."""
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_read_db, get_write_db
 from app.schemas.leaderboard import (
     ScoreSubmit,
     ScoreSubmitResponse,
     LeaderboardResponse,
     PlayerRankResponse,
+    PlayerRanksQuery,
     APIResponse
 )
+from app.schemas.packed import PACKED_MEDIA_TYPE, encode
 from app.services.leaderboard import LeaderboardService
+from app.services.season import SeasonService
 from app.config import settings
 
 router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
 
 
+def media_quality(accept: str, media_type: str) -> float:
+    """
+    Get the q-value an Accept header gives a media type.
+    
+    The most specific matching media range wins, as in RFC 9110.
+    
+    Args:
+        accept: Request Accept header
+        media_type: Media type such as "application/json"
+        
+    Returns:
+        q-value, 0 if the media type is not acceptable
+    """
+    main_type, sub_type = media_type.split("/")
+    specificity, quality = -1, 0.0
+    for media_range in accept.split(","):
+        range_type, *params = [field.strip() for field in media_range.split(";")]
+        range_main, _, range_sub = range_type.lower().partition("/")
+        
+        if (range_main, range_sub) == (main_type, sub_type):
+            match = 2
+        elif range_main == main_type and range_sub == "*":
+            match = 1
+        elif (range_main, range_sub) == ("*", "*"):
+            match = 0
+        else:
+            continue
+        if match <= specificity:
+            continue
+        
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        specificity, quality = match, q
+    return quality
+
+
+def wants_packed(accept: Optional[str]) -> bool:
+    """Check whether the client prefers the packed format over JSON."""
+    if not accept:
+        return False
+    packed = media_quality(accept, PACKED_MEDIA_TYPE)
+    return packed > 0 and packed > media_quality(accept, "application/json")
+
+
+def respond(result, accept: Optional[str], response: Response):
+    """
+    Build a success response in the format the client asked for.
+    
+    Args:
+        result: Response payload
+        accept: Request Accept header
+        response: Response used to set headers on the JSON response
+        
+    Returns:
+        Packed binary response if preferred, otherwise the JSON API response
+    """
+    # The body depends on Accept, so caches must key on it
+    if wants_packed(accept):
+        return Response(
+            content=encode(result),
+            media_type=PACKED_MEDIA_TYPE,
+            headers={"Vary": "Accept"}
+        )
+    response.headers["Vary"] = "Accept"
+    return APIResponse(code=0, message="success", data=result)
+
+
 @router.post("/submit", response_model=APIResponse)
-async def submit_score(
+def submit_score(
+    response: Response,
     score_data: ScoreSubmit,
-    db: Session = Depends(get_db)
+    accept: Optional[str] = Header(default=None),
+    db: Session = Depends(get_write_db)
 ):
     """
     Submit player score.
     
     Args:
+        response: Response headers
         score_data: Score submission data
+        accept: Accept header, selects JSON or packed binary output
         db: Database session
         
     Returns:
@@ -33,13 +115,14 @@ async def submit_score(
     """
     try:
         result = LeaderboardService.submit_score(db, score_data)
-        return APIResponse(code=0, message="success", data=result)
+        return respond(result, accept, response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("", response_model=APIResponse)
-async def get_leaderboard(
+def get_leaderboard(
+    response: Response,
     limit: int = Query(
         default=settings.default_page_limit,
         ge=1,
@@ -56,54 +139,113 @@ async def get_leaderboard(
         regex="^(daily|weekly|monthly|all)$",
         description="Time range: daily, weekly, monthly, all"
     ),
-    db: Session = Depends(get_db)
+    season: Optional[str] = Query(
+        default=None,
+        max_length=64,
+        description="Archived season name, omit for the current season; requires time_range=all"
+    ),
+    accept: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get leaderboard list.
     
     Args:
+        response: Response headers
         limit: Number of records to return
         offset: Offset for pagination
         time_range: Time range filter
+        season: Archived season name
+        accept: Accept header, selects JSON or packed binary output
         db: Database session
         
     Returns:
         API response with leaderboard entries
     """
     try:
-        result = LeaderboardService.get_leaderboard(db, limit, offset, time_range)
-        return APIResponse(code=0, message="success", data=result)
+        if season is not None and time_range != "all":
+            raise HTTPException(status_code=400, detail="time_range cannot be combined with season")
+        if season is None:
+            result = LeaderboardService.get_leaderboard(db, limit, offset, time_range)
+        else:
+            if not SeasonService.season_exists(db, season):
+                raise HTTPException(status_code=404, detail="Season not found")
+            result = SeasonService.get_leaderboard(db, season, limit, offset)
+        return respond(result, accept, response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/player/{player_id}", response_model=APIResponse)
-async def get_player_rank(
+def get_player_rank(
+    response: Response,
     player_id: str,
     time_range: str = Query(
         default="all",
         regex="^(daily|weekly|monthly|all)$",
         description="Time range: daily, weekly, monthly, all"
     ),
-    db: Session = Depends(get_db)
+    season: Optional[str] = Query(
+        default=None,
+        max_length=64,
+        description="Archived season name, omit for the current season; requires time_range=all"
+    ),
+    accept: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get player rank information.
     
     Args:
+        response: Response headers
         player_id: Player unique identifier
         time_range: Time range filter
+        season: Archived season name
+        accept: Accept header, selects JSON or packed binary output
         db: Database session
         
     Returns:
         API response with player rank information
     """
     try:
-        result = LeaderboardService.get_player_rank(db, player_id, time_range)
+        if season is not None and time_range != "all":
+            raise HTTPException(status_code=400, detail="time_range cannot be combined with season")
+        if season is None:
+            result = LeaderboardService.get_player_rank(db, player_id, time_range)
+        else:
+            result = SeasonService.get_player_rank(db, season, player_id)
         if result is None:
             raise HTTPException(status_code=404, detail="Player not found")
-        return APIResponse(code=0, message="success", data=result)
+        return respond(result, accept, response)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/players/ranks", response_model=APIResponse)
+def get_player_ranks(
+    response: Response,
+    query: PlayerRanksQuery,
+    accept: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get rank information for several players at once.
+    
+    Args:
+        response: Response headers
+        query: Player IDs to look up
+        accept: Accept header, selects JSON or packed binary output
+        db: Database session
+        
+    Returns:
+        API response with each found player's rank information
+    """
+    try:
+        result = LeaderboardService.get_player_ranks(db, query.player_ids)
+        return respond(result, accept, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
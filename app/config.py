@@ -1,4 +1,6 @@
 """Application configuration."""
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +13,14 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./leaderboard.db"
+    database_read_url: Optional[str] = None
+    read_pool_size: int = 5
+    read_max_overflow: int = 10
+    sqlite_wal: bool = True
+    sqlite_busy_timeout: float = 15.0
+    
+    # Compression
+    gzip_minimum_size: int = 1000
     
     # CORS
     cors_origins: list[str] = ["*"]
@@ -19,6 +29,26 @@ class Settings(BaseSettings):
     max_leaderboard_size: int = 1000
     default_page_limit: int = 50
     max_page_limit: int = 100
+    # "all" keeps every submission, "best" only persists improving scores
+    score_retention: str = "all"
+    
+    # Anti-cheat
+    anticheat_enabled: bool = True
+    anticheat_workers: int = 1
+    anticheat_queue_size: int = 10000
+    anticheat_batch_size: int = 100
+    anticheat_batch_wait: float = 0.5
+    anticheat_future_tolerance: int = 300
+    anticheat_outlier_window: int = 1000
+    anticheat_outlier_min_samples: int = 50
+    anticheat_outlier_threshold: float = 10.0
+    anticheat_rate_window: int = 60
+    anticheat_rate_limit: int = 30
+    
+    # Seasons
+    snapshot_dir: str = "./snapshots"
+    snapshot_pages_per_step: int = 256
+    snapshot_step_sleep: float = 0.005
     
     # Logging
     log_level: str = "INFO"
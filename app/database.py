@@ -1,26 +1,109 @@
 """Database configuration and session management."""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},  # Needed for SQLite
-    echo=settings.log_level == "DEBUG"
-)
 
-# Create SessionLocal class
+def _is_sqlite(url) -> bool:
+    """Check whether a database URL points to SQLite."""
+    return url.get_backend_name() == "sqlite"
+
+
+def _is_sqlite_file(url) -> bool:
+    """Check whether a database URL points to an on-disk SQLite database."""
+    return _is_sqlite(url) and url.database not in (None, "", ":memory:")
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    """Switch SQLite to WAL so readers never block the writer."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def create_write_engine(url):
+    """
+    Create a writer engine (a single connection for on-disk SQLite).
+    
+    Args:
+        url: Database URL
+        
+    Returns:
+        SQLAlchemy engine
+    """
+    url = make_url(url)
+    if _is_sqlite(url):
+        # Writers wait this long for the lock instead of failing with "database is locked"
+        kwargs = {"connect_args": {"check_same_thread": False, "timeout": settings.sqlite_busy_timeout}}
+        if _is_sqlite_file(url):
+            kwargs.update(pool_size=1, max_overflow=0)
+    else:
+        kwargs = {}
+    
+    write_engine = create_engine(url, echo=settings.log_level == "DEBUG", **kwargs)
+    if _is_sqlite_file(url) and settings.sqlite_wal:
+        event.listen(write_engine, "connect", _enable_wal)
+    return write_engine
+
+
+def create_read_engine(url, read_url=None):
+    """
+    Create a reader engine with its own pool.
+    
+    Args:
+        url: Writer database URL
+        read_url: Optional replica URL
+        
+    Returns:
+        SQLAlchemy engine, or None if reads cannot use a separate engine
+    """
+    url = make_url(url)
+    if read_url:
+        return create_engine(
+            read_url,
+            pool_size=settings.read_pool_size,
+            max_overflow=settings.read_max_overflow,
+            echo=settings.log_level == "DEBUG"
+        )
+    if _is_sqlite_file(url):
+        return create_engine(
+            f"sqlite:///file:{url.database}?mode=ro&uri=true",
+            connect_args={"check_same_thread": False},
+            pool_size=settings.read_pool_size,
+            max_overflow=settings.read_max_overflow,
+            echo=settings.log_level == "DEBUG"
+        )
+    # In-memory SQLite cannot be shared across engines
+    return None
+
+
+# Create SQLAlchemy writer and reader engines
+engine = create_write_engine(settings.database_url)
+read_engine = create_read_engine(settings.database_url, settings.database_read_url) or engine
+
+# Background workers get their own writer so they never take the request writer's slot
+database_url = make_url(settings.database_url)
+if _is_sqlite(database_url) and not _is_sqlite_file(database_url):
+    # In-memory SQLite cannot be shared across engines
+    worker_engine = engine
+else:
+    worker_engine = create_write_engine(database_url)
+
+# Create session classes
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
 
 # Create Base class
 Base = declarative_base()
 
 
-def get_db():
-    """Get database session."""
+def get_write_db():
+    """Get database session on the writer connection."""
     db = SessionLocal()
     try:
         yield db
@@ -28,6 +111,15 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Get database session on a read-only connection."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
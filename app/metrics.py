@@ -0,0 +1,23 @@
+"""In-process application metrics."""
+import threading
+
+
+class Counters:
+    """Thread-safe named counters (per worker process)."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: dict[str, int] = {}
+    
+    def inc(self, name: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+    
+    def snapshot(self) -> dict[str, int]:
+        """Return a copy of all counter values."""
+        with self._lock:
+            return dict(self._values)
+
+
+counters = Counters()
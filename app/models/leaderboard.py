@@ -1,7 +1,7 @@
 """Leaderboard database model."""
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
 from app.database import Base
 
 
@@ -24,3 +24,50 @@ class Leaderboard(Base):
     
     def __repr__(self):
         return f"<Leaderboard(player_id={self.player_id}, score={self.score})>"
+
+
+class ScoreFlag(Base):
+    """Score record flagged by anti-cheat checks, excluded from rankings."""
+    
+    __tablename__ = "score_flags"
+    
+    record_id = Column(Integer, primary_key=True)
+    reason = Column(String(64), nullable=False)
+    flagged_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<ScoreFlag(record_id={self.record_id}, reason={self.reason})>"
+
+
+class PlayerBest(Base):
+    """Best score per player in the current season."""
+    
+    __tablename__ = "player_best"
+    
+    player_id = Column(String(255), primary_key=True)
+    score = Column(Integer, nullable=False, index=True)
+    timestamp = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<PlayerBest(player_id={self.player_id}, score={self.score})>"
+
+
+class SeasonArchive(Base):
+    """Frozen final standings of an ended season (one row per player)."""
+    
+    __tablename__ = "season_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    season = Column(String(64), nullable=False)
+    rank = Column(Integer, nullable=False)
+    player_id = Column(String(255), nullable=False)
+    score = Column(Integer, nullable=False)
+    timestamp = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('season', 'player_id', name='uq_season_player'),
+        Index('idx_season_rank', 'season', 'rank'),
+    )
+    
+    def __repr__(self):
+        return f"<SeasonArchive(season={self.season}, rank={self.rank}, player_id={self.player_id})>"
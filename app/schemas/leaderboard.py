@@ -1,5 +1,5 @@
 """Pydantic schemas for leaderboard."""
-from typing import Optional
+from typing import Annotated, Optional
 from pydantic import BaseModel, Field
 
 
@@ -12,6 +12,12 @@ class ScoreSubmit(BaseModel):
     timestamp: Optional[int] = Field(None, ge=0, description="Submission timestamp (seconds)")
 
 
+class PlayerRanksQuery(BaseModel):
+    """Schema for looking up several players' ranks at once."""
+    
+    player_ids: list[Annotated[str, Field(min_length=1, max_length=255)]] = Field(..., min_length=1, max_length=200, description="Player unique identifiers")
+
+
 # Response schemas
 class ScoreSubmitResponse(BaseModel):
     """Response after submitting a score."""
@@ -45,8 +51,34 @@ class PlayerRankResponse(BaseModel):
     player_id: str = Field(..., description="Player ID")
     rank: int = Field(..., description="Current rank, 0 if not ranked")
     score: int = Field(..., description="Highest score")
-    timestamp: int = Field(..., description="Highest score submission timestamp")
+    timestamp: int = Field(..., description="Submission timestamp of the highest score record")
+    total_players: int = Field(..., description="Total participating players")
+
+
+class PlayerRankEntry(BaseModel):
+    """Single player's rank in a batch lookup."""
+    
+    player_id: str = Field(..., description="Player ID")
+    rank: int = Field(..., description="Current rank")
+    score: int = Field(..., description="Highest score")
+    timestamp: int = Field(..., description="Submission timestamp of the highest score record")
+
+
+class PlayerRanksResponse(BaseModel):
+    """Response for batch player rank query."""
+    
     total_players: int = Field(..., description="Total participating players")
+    players: list[PlayerRankEntry] = Field(..., description="Ranks of the found players, in request order")
+    not_found: list[str] = Field(..., description="Requested player IDs without any score")
+
+
+class SeasonRolloverResponse(BaseModel):
+    """Result of ending a season."""
+    
+    season: str = Field(..., description="Archived season name")
+    archived_players: int = Field(..., description="Players frozen into the archive board")
+    deleted_records: int = Field(..., description="Live score records cleared for the new season")
+    snapshot_path: Optional[str] = Field(None, description="Point-in-time database snapshot file")
 
 
 # Standard API response wrapper
@@ -55,4 +87,4 @@ class APIResponse(BaseModel):
     
     code: int = Field(0, description="Status code, 0 for success")
     message: str = Field("success", description="Response message")
-    data: Optional[ScoreSubmitResponse | LeaderboardResponse | PlayerRankResponse] = None
+    data: Optional[ScoreSubmitResponse | LeaderboardResponse | PlayerRankResponse | PlayerRanksResponse] = None
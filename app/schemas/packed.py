@@ -0,0 +1,111 @@
+"""Compact binary encoding of leaderboard responses.
+
+Layout (all integers little-endian)::
+
+    header    magic "CTLB", u8 version, u8 payload type
+    strings   u16 count, then per player ID: u16 byte length + UTF-8 bytes
+    payload   depends on the payload type, player IDs are u16 string indexes
+
+    entry     u32 rank, u16 player, s64 score, s64 timestamp
+
+    1 submit        u32 rank, s64 best_score
+    2 leaderboard   u32 total, u16 count, entry * count
+    3 player rank   entry, u32 total_players
+    4 player ranks  u32 total_players, u16 count, entry * count,
+                    u16 not_found count, u16 player * not_found count
+"""
+import struct
+
+from app.schemas.leaderboard import (
+    ScoreSubmitResponse,
+    LeaderboardResponse,
+    PlayerRankResponse,
+    PlayerRanksResponse
+)
+
+PACKED_MEDIA_TYPE = "application/x-ctrail-packed"
+PACKED_VERSION = 1
+
+MAGIC = b"CTLB"
+TYPE_SUBMIT = 1
+TYPE_LEADERBOARD = 2
+TYPE_PLAYER_RANK = 3
+TYPE_PLAYER_RANKS = 4
+
+_HEADER = struct.Struct("<4sBB")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_SUBMIT = struct.Struct("<Iq")
+_ENTRY = struct.Struct("<IHqq")
+
+
+class _StringTable:
+    """Interns player IDs into u16 indexes."""
+    
+    def __init__(self):
+        self.index: dict[str, int] = {}
+    
+    def intern(self, value: str) -> int:
+        """Return the index of a string, adding it if new."""
+        if value not in self.index:
+            self.index[value] = len(self.index)
+        return self.index[value]
+    
+    def pack(self) -> bytes:
+        """Encode the table."""
+        parts = [_U16.pack(len(self.index))]
+        for value in self.index:
+            raw = value.encode("utf-8")
+            parts.append(_U16.pack(len(raw)))
+            parts.append(raw)
+        return b"".join(parts)
+
+
+def encode(
+    data: ScoreSubmitResponse | LeaderboardResponse | PlayerRankResponse | PlayerRanksResponse
+) -> bytes:
+    """
+    Encode a response payload in the packed format.
+    
+    Args:
+        data: Response payload
+    
+    Returns:
+        Encoded bytes
+    """
+    strings = _StringTable()
+    
+    if isinstance(data, ScoreSubmitResponse):
+        payload_type = TYPE_SUBMIT
+        body = _SUBMIT.pack(data.rank, data.best_score)
+    elif isinstance(data, LeaderboardResponse):
+        payload_type = TYPE_LEADERBOARD
+        body = b"".join([
+            _U32.pack(data.total),
+            _U16.pack(len(data.entries)),
+            *(
+                _ENTRY.pack(e.rank, strings.intern(e.player_id), e.score, e.timestamp)
+                for e in data.entries
+            )
+        ])
+    elif isinstance(data, PlayerRankResponse):
+        payload_type = TYPE_PLAYER_RANK
+        body = _ENTRY.pack(
+            data.rank, strings.intern(data.player_id), data.score, data.timestamp
+        ) + _U32.pack(data.total_players)
+    elif isinstance(data, PlayerRanksResponse):
+        payload_type = TYPE_PLAYER_RANKS
+        body = b"".join([
+            _U32.pack(data.total_players),
+            _U16.pack(len(data.players)),
+            *(
+                _ENTRY.pack(p.rank, strings.intern(p.player_id), p.score, p.timestamp)
+                for p in data.players
+            ),
+            _U16.pack(len(data.not_found)),
+            *(_U16.pack(strings.intern(player_id)) for player_id in data.not_found)
+        ])
+    else:
+        raise TypeError(f"Cannot pack {type(data).__name__}")
+    
+    return _HEADER.pack(MAGIC, PACKED_VERSION, payload_type) + strings.pack() + body
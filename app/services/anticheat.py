@@ -0,0 +1,274 @@
+"""Asynchronous anti-cheat validation pipeline."""
+import logging
+from abc import ABC, abstractmethod
+import queue
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, func
+
+from app.config import settings
+from app.metrics import counters
+from app.models.leaderboard import Leaderboard, ScoreFlag
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Submission:
+    """Accepted score record awaiting validation."""
+    
+    record_id: int
+    player_id: str
+    score: int
+    timestamp: int
+
+
+class ScoreCheck(ABC):
+    """Base class for pluggable anti-cheat checks."""
+    
+    name: str = "check"
+    
+    @abstractmethod
+    def run(self, db: Session, batch: list[Submission]) -> dict[int, str]:
+        """
+        Check a batch of submissions.
+        
+        Args:
+            db: Read database session
+            batch: Submissions to check
+        
+        Returns:
+            Mapping of flagged record ID to reason
+        """
+
+
+class FutureTimestampCheck(ScoreCheck):
+    """Flag submissions timestamped in the future."""
+    
+    name = "future_timestamp"
+    
+    def run(self, db: Session, batch: list[Submission]) -> dict[int, str]:
+        limit = int(datetime.now(timezone.utc).timestamp()) + settings.anticheat_future_tolerance
+        return {item.record_id: self.name for item in batch if item.timestamp > limit}
+
+
+class ScoreOutlierCheck(ScoreCheck):
+    """Flag scores far above the recent score distribution (robust z-score)."""
+    
+    name = "score_outlier"
+    
+    def run(self, db: Session, batch: list[Submission]) -> dict[int, str]:
+        # One query for the whole batch
+        recent = [
+            row.score for row in db.query(Leaderboard.score).filter(
+                ~Leaderboard.id.in_(db.query(ScoreFlag.record_id))
+            ).order_by(desc(Leaderboard.id)).limit(settings.anticheat_outlier_window)
+        ]
+        if len(recent) < settings.anticheat_outlier_min_samples:
+            return {}
+        
+        median = statistics.median(recent)
+        mad = statistics.median(abs(score - median) for score in recent)
+        if mad == 0:
+            return {}
+        
+        # 1.4826 scales the MAD to a standard deviation for normal data
+        limit = median + settings.anticheat_outlier_threshold * 1.4826 * mad
+        return {item.record_id: self.name for item in batch if item.score > limit}
+
+
+class SubmissionRateCheck(ScoreCheck):
+    """Flag submissions from players submitting faster than the rate limit."""
+    
+    name = "submission_rate"
+    
+    def run(self, db: Session, batch: list[Submission]) -> dict[int, str]:
+        since = datetime.utcnow() - timedelta(seconds=settings.anticheat_rate_window)
+        player_ids = {item.player_id for item in batch}
+        
+        # One grouped count for all players in the batch
+        over_limit = {
+            row.player_id for row in db.query(Leaderboard.player_id).filter(
+                Leaderboard.player_id.in_(player_ids),
+                Leaderboard.created_at >= since
+            ).group_by(Leaderboard.player_id).having(
+                func.count(Leaderboard.id) > settings.anticheat_rate_limit
+            )
+        }
+        return {item.record_id: self.name for item in batch if item.player_id in over_limit}
+
+
+class ValidationPipeline:
+    """Background worker pool running anti-cheat checks in batches."""
+    
+    def __init__(self, checks: list[ScoreCheck]):
+        self.checks = checks
+        self._queue: Optional[queue.Queue] = None
+        self._threads: list[threading.Thread] = []
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._read_session_factory: Optional[Callable[[], Session]] = None
+    
+    @property
+    def running(self) -> bool:
+        """Whether worker threads are accepting submissions."""
+        return self._queue is not None
+    
+    def start(
+        self,
+        session_factory: Callable[[], Session],
+        read_session_factory: Callable[[], Session]
+    ) -> None:
+        """
+        Start the worker threads.
+        
+        Args:
+            session_factory: Writer session factory used to store flags;
+                should not share the request writer pool
+            read_session_factory: Reader session factory, used by checks
+        """
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._read_session_factory = read_session_factory
+        self._queue = queue.Queue(maxsize=settings.anticheat_queue_size)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"anticheat-{i}", daemon=True)
+            for i in range(settings.anticheat_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Drain the queue and stop the worker threads."""
+        if not self.running:
+            return
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._queue = None
+        self._threads = []
+    
+    def enqueue(self, submission: Submission) -> None:
+        """Hand an accepted submission to the workers without blocking."""
+        if not self.running:
+            return
+        try:
+            self._queue.put_nowait(submission)
+            counters.inc("anticheat.enqueued")
+        except queue.Full:
+            counters.inc("anticheat.dropped")
+    
+    def process_batch(
+        self,
+        read_db: Session,
+        write_db: Session,
+        batch: list[Submission]
+    ) -> dict[int, str]:
+        """
+        Run all checks over a batch and store the flags.
+        
+        Args:
+            read_db: Read database session, used by checks
+            write_db: Write database session, used to store flags
+            batch: Submissions to check
+        
+        Returns:
+            Mapping of flagged record ID to reason
+        """
+        # Imported here: the leaderboard service enqueues into this pipeline
+        from app.services.leaderboard import LeaderboardService
+        
+        flags: dict[int, str] = {}
+        for check in self.checks:
+            for record_id, reason in check.run(read_db, batch).items():
+                flags.setdefault(record_id, reason)
+        counters.inc("anticheat.batches")
+        
+        if not flags:
+            return flags
+        
+        submissions = {item.record_id: item for item in batch}
+        try:
+            # Skip records already flagged or deleted since they were enqueued;
+            # IDs can be reused after a rollover, so the row must still match
+            existing = {
+                row.id: row.player_id for row in write_db.query(
+                    Leaderboard.id, Leaderboard.player_id, Leaderboard.score, Leaderboard.timestamp
+                ).filter(
+                    Leaderboard.id.in_(list(flags)),
+                    ~Leaderboard.id.in_(write_db.query(ScoreFlag.record_id))
+                )
+                if (row.player_id, row.score, row.timestamp) == (
+                    submissions[row.id].player_id,
+                    submissions[row.id].score,
+                    submissions[row.id].timestamp
+                )
+            }
+            if not existing:
+                write_db.rollback()
+                return flags
+            write_db.add_all(
+                ScoreFlag(record_id=record_id, reason=flags[record_id])
+                for record_id in existing
+            )
+            write_db.flush()
+            # Flagged records may have been their player's best
+            LeaderboardService.rebuild_player_best(write_db, list(set(existing.values())))
+            write_db.commit()
+        except Exception:
+            write_db.rollback()
+            raise
+        
+        counters.inc("anticheat.flagged", len(existing))
+        return flags
+    
+    def _next_batch(self) -> tuple[list[Submission], bool]:
+        """Collect up to one batch of submissions; report whether to stop."""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        
+        batch = [item]
+        deadline = time.monotonic() + settings.anticheat_batch_wait
+        while len(batch) < settings.anticheat_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+    
+    def _worker(self) -> None:
+        """Worker thread loop."""
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if not batch:
+                continue
+            read_db = self._read_session_factory()
+            write_db = self._session_factory()
+            try:
+                self.process_batch(read_db, write_db, batch)
+            except Exception:
+                logger.exception("Anti-cheat batch of %d submissions failed", len(batch))
+            finally:
+                read_db.close()
+                write_db.close()
+
+
+pipeline = ValidationPipeline([
+    FutureTimestampCheck(),
+    ScoreOutlierCheck(),
+    SubmissionRateCheck(),
+])
@@ -1,19 +1,167 @@
 """Leaderboard service layer."""
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import case, desc, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 
-from app.models.leaderboard import Leaderboard
+from app.config import settings
+from app.metrics import counters
+from app.models.leaderboard import Leaderboard, PlayerBest, ScoreFlag
+from app.services.anticheat import Submission, pipeline
 from app.schemas.leaderboard import (
     ScoreSubmit,
     ScoreSubmitResponse,
     LeaderboardEntry,
     LeaderboardResponse,
-    PlayerRankResponse
+    PlayerRankResponse,
+    PlayerRankEntry,
+    PlayerRanksResponse
 )
 
 
+_DIALECT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def unflagged():
+    """Filter clause excluding score records flagged by anti-cheat checks."""
+    return ~Leaderboard.id.in_(select(ScoreFlag.record_id))
+
+
+def best_records(
+    db: Session,
+    player_ids: Optional[list[str]] = None,
+    last_id: Optional[int] = None
+):
+    """
+    Each player's best (earliest on ties) unflagged score record.
+    
+    Args:
+        db: Database session
+        player_ids: Only these players, default all players
+        last_id: Only records with an ID up to this one
+        
+    Returns:
+        Subquery with player_id, score and timestamp columns
+    """
+    query = db.query(
+        Leaderboard.player_id,
+        Leaderboard.score,
+        Leaderboard.timestamp,
+        func.row_number().over(
+            partition_by=Leaderboard.player_id,
+            order_by=(desc(Leaderboard.score), Leaderboard.timestamp)
+        ).label('rn')
+    ).filter(
+        unflagged()
+    )
+    if player_ids is not None:
+        query = query.filter(Leaderboard.player_id.in_(player_ids))
+    if last_id is not None:
+        query = query.filter(Leaderboard.id <= last_id)
+    
+    ranked = query.subquery()
+    return select(
+        ranked.c.player_id,
+        ranked.c.score,
+        ranked.c.timestamp
+    ).where(ranked.c.rn == 1).subquery()
+
+
+def _upsert_player_best(db: Session, player_id: str, score: int, timestamp: int) -> int:
+    """
+    Atomically raise a player's stored best score.
+    
+    A single INSERT ... ON CONFLICT DO UPDATE (ON DUPLICATE KEY UPDATE on
+    MySQL), so concurrent submits for the same player neither collide on the
+    primary key nor lower the best. Other databases lock the row with
+    SELECT ... FOR UPDATE instead.
+    
+    Args:
+        db: Database session
+        player_id: Player ID
+        score: Submitted score
+        timestamp: Submission timestamp
+        
+    Returns:
+        Player's best score after the update
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return _upsert_player_best_mysql(db, player_id, score, timestamp)
+    if dialect not in _DIALECT_INSERTS:
+        return _upsert_player_best_locked(db, player_id, score, timestamp)
+    
+    stmt = _DIALECT_INSERTS[dialect](PlayerBest).values(
+        player_id=player_id,
+        score=score,
+        timestamp=timestamp
+    )
+    improves = stmt.excluded.score > PlayerBest.score
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlayerBest.player_id],
+        set_={
+            "score": case((improves, stmt.excluded.score), else_=PlayerBest.score),
+            "timestamp": case((improves, stmt.excluded.timestamp), else_=PlayerBest.timestamp)
+        }
+    ).returning(PlayerBest.score)
+    return db.execute(stmt).scalar_one()
+
+
+def _upsert_player_best_mysql(db: Session, player_id: str, score: int, timestamp: int) -> int:
+    """MySQL variant of _upsert_player_best, which has no RETURNING."""
+    stmt = mysql.insert(PlayerBest).values(
+        player_id=player_id,
+        score=score,
+        timestamp=timestamp
+    )
+    improves = stmt.inserted.score > PlayerBest.score
+    # MySQL applies assignments left to right, so timestamp must be set
+    # while score still holds the old value
+    stmt = stmt.on_duplicate_key_update([
+        ("timestamp", case((improves, stmt.inserted.timestamp), else_=PlayerBest.timestamp)),
+        ("score", case((improves, stmt.inserted.score), else_=PlayerBest.score))
+    ])
+    db.execute(stmt)
+    # The upsert holds the row lock until commit, so this reads our own result
+    return db.scalar(select(PlayerBest.score).where(PlayerBest.player_id == player_id))
+
+
+def _upsert_player_best_locked(db: Session, player_id: str, score: int, timestamp: int) -> int:
+    """Fallback for databases without an upsert: lock the row, then update or insert."""
+    best = db.scalar(
+        select(PlayerBest.score).where(PlayerBest.player_id == player_id).with_for_update()
+    )
+    if best is None:
+        try:
+            # A concurrent submit may insert the first best between our read and insert
+            with db.begin_nested():
+                db.execute(insert(PlayerBest).values(
+                    player_id=player_id,
+                    score=score,
+                    timestamp=timestamp
+                ))
+            return score
+        except IntegrityError:
+            best = db.scalar(
+                select(PlayerBest.score).where(PlayerBest.player_id == player_id).with_for_update()
+            )
+    
+    if score <= best:
+        return best
+    db.execute(
+        update(PlayerBest).where(
+            PlayerBest.player_id == player_id,
+            PlayerBest.score < score
+        ).values(score=score, timestamp=timestamp)
+    )
+    return score
+
+
 class LeaderboardService:
     """Service for leaderboard operations."""
     
@@ -32,6 +180,21 @@ class LeaderboardService:
         # Use provided timestamp or current time
         timestamp = score_data.timestamp or int(datetime.now(timezone.utc).timestamp())
         
+        # Stored best, looked up by primary key
+        best_score = db.query(PlayerBest.score).filter(
+            PlayerBest.player_id == score_data.player_id
+        ).scalar()
+        improves = best_score is None or score_data.score > best_score
+        
+        # Fast path: score does not improve on the best, no record under best-only retention
+        if not improves and settings.score_retention == "best":
+            counters.inc("submit.fast_path")
+            counters.inc("submit.persist_skipped")
+            return ScoreSubmitResponse(
+                rank=LeaderboardService._rank_of(db, best_score),
+                best_score=best_score
+            )
+        
         # Create new score record
         new_score = Leaderboard(
             player_id=score_data.player_id,
@@ -39,19 +202,82 @@ class LeaderboardService:
             timestamp=timestamp
         )
         db.add(new_score)
-        db.commit()
+        db.flush()
+        record_id = new_score.id
         
-        # Get player's best score
-        best_score = db.query(func.max(Leaderboard.score)).filter(
-            Leaderboard.player_id == score_data.player_id
-        ).scalar() or 0
+        if improves:
+            best_score = _upsert_player_best(db, score_data.player_id, score_data.score, timestamp)
+            counters.inc("submit.best_updated")
+        else:
+            counters.inc("submit.fast_path")
         
         # Calculate current rank
-        rank = db.query(func.count(func.distinct(Leaderboard.player_id))).filter(
-            Leaderboard.score > best_score
+        response = ScoreSubmitResponse(
+            rank=LeaderboardService._rank_of(db, best_score),
+            best_score=best_score
+        )
+        db.commit()
+        
+        # Validation runs off the request path
+        pipeline.enqueue(Submission(record_id, score_data.player_id, score_data.score, timestamp))
+        
+        return response
+    
+    @staticmethod
+    def _rank_of(db: Session, score: int) -> int:
+        """Competition rank of a best score, counted on the indexed best scores."""
+        return db.query(func.count(PlayerBest.player_id)).filter(
+            PlayerBest.score > score
         ).scalar() + 1
+    
+    @staticmethod
+    def sync_player_best(db: Session) -> None:
+        """
+        Backfill best scores for databases created before they were tracked.
+        
+        Args:
+            db: Database session
+        """
+        if db.query(PlayerBest.player_id).first() is not None:
+            return
+        if db.query(Leaderboard.id).first() is None:
+            return
+        LeaderboardService.rebuild_player_best(db)
+        db.commit()
+    
+    @staticmethod
+    def rebuild_player_best(db: Session, player_ids: Optional[list[str]] = None) -> int:
+        """
+        Rebuild best scores from the score records.
         
-        return ScoreSubmitResponse(rank=rank, best_score=best_score)
+        Must be called after score records are deleted or flagged outside
+        of ``submit_score``. The caller is responsible for committing.
+        
+        Args:
+            db: Database session
+            player_ids: Only rebuild these players, default all players
+            
+        Returns:
+            Number of players rebuilt with a best score
+        """
+        stale = db.query(PlayerBest)
+        if player_ids is not None:
+            stale = stale.filter(PlayerBest.player_id.in_(player_ids))
+        stale.delete(synchronize_session=False)
+        
+        if player_ids is None:
+            # Drop flags of deleted records so reused IDs start clean
+            db.query(ScoreFlag).filter(
+                ~ScoreFlag.record_id.in_(select(Leaderboard.id))
+            ).delete(synchronize_session=False)
+        
+        best = best_records(db, player_ids=player_ids)
+        return db.execute(
+            insert(PlayerBest).from_select(
+                ['player_id', 'score', 'timestamp'],
+                select(best.c.player_id, best.c.score, best.c.timestamp)
+            )
+        ).rowcount
     
     @staticmethod
     def get_leaderboard(
@@ -77,6 +303,8 @@ class LeaderboardService:
             Leaderboard.player_id,
             func.max(Leaderboard.score).label('max_score'),
             func.max(Leaderboard.timestamp).label('latest_timestamp')
+        ).filter(
+            unflagged()
         ).group_by(Leaderboard.player_id).subquery()
         
         # Join to get full records
@@ -88,6 +316,8 @@ class LeaderboardService:
             subquery,
             (Leaderboard.player_id == subquery.c.player_id) &
             (Leaderboard.score == subquery.c.max_score)
+        ).filter(
+            unflagged()
         ).order_by(desc(Leaderboard.score), Leaderboard.timestamp)
         
         # Get total count
@@ -126,29 +356,66 @@ class LeaderboardService:
         Returns:
             PlayerRankResponse or None if player not found
         """
-        # Get player's best score
-        player_best = db.query(
-            func.max(Leaderboard.score).label('score'),
-            func.max(Leaderboard.timestamp).label('timestamp')
-        ).filter(
-            Leaderboard.player_id == player_id
-        ).first()
-        
-        if not player_best or player_best.score is None:
+        # Same best score, timestamp and rank as the batch lookup
+        result = LeaderboardService.get_player_ranks(db, [player_id])
+        if not result.players:
             return None
         
-        # Calculate rank
-        rank = db.query(func.count(func.distinct(Leaderboard.player_id))).filter(
-            Leaderboard.score > player_best.score
-        ).scalar() + 1
-        
-        # Get total players
-        total_players = db.query(func.count(func.distinct(Leaderboard.player_id))).scalar()
-        
+        entry = result.players[0]
         return PlayerRankResponse(
             player_id=player_id,
-            rank=rank,
-            score=player_best.score,
-            timestamp=player_best.timestamp,
-            total_players=total_players
+            rank=entry.rank,
+            score=entry.score,
+            timestamp=entry.timestamp,
+            total_players=result.total_players
+        )
+    
+    @staticmethod
+    def get_player_ranks(db: Session, player_ids: list[str]) -> PlayerRanksResponse:
+        """
+        Get rank information for several players at once.
+        
+        Total players is computed once and all ranks are resolved in a
+        single query against the per-player best scores.
+        
+        Args:
+            db: Database session
+            player_ids: Player IDs
+            
+        Returns:
+            PlayerRanksResponse with found players in request order
+        """
+        # Drop duplicates, keeping request order
+        player_ids = list(dict.fromkeys(player_ids))
+        
+        higher = aliased(PlayerBest)
+        rank = db.query(func.count(higher.player_id)).filter(
+            higher.score > PlayerBest.score
+        ).scalar_subquery() + 1
+        
+        rows = db.query(
+            PlayerBest.player_id,
+            PlayerBest.score,
+            PlayerBest.timestamp,
+            rank.label('rank')
+        ).filter(
+            PlayerBest.player_id.in_(player_ids)
+        ).all()
+        found = {row.player_id: row for row in rows}
+        
+        total_players = db.query(func.count(PlayerBest.player_id)).scalar()
+        
+        return PlayerRanksResponse(
+            total_players=total_players,
+            players=[
+                PlayerRankEntry(
+                    player_id=player_id,
+                    rank=found[player_id].rank,
+                    score=found[player_id].score,
+                    timestamp=found[player_id].timestamp
+                )
+                for player_id in player_ids
+                if player_id in found
+            ],
+            not_found=[player_id for player_id in player_ids if player_id not in found]
         )
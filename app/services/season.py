@@ -0,0 +1,223 @@
+"""Season snapshot and rollover service layer."""
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, func, insert, select
+
+from app.config import settings
+from app.models.leaderboard import Leaderboard, SeasonArchive
+from app.schemas.leaderboard import (
+    SeasonRolloverResponse,
+    LeaderboardEntry,
+    LeaderboardResponse,
+    PlayerRankResponse
+)
+from app.services.leaderboard import LeaderboardService, best_records
+
+
+class SeasonService:
+    """Service for season snapshots and archived boards."""
+    
+    @staticmethod
+    def snapshot(db: Session, target_path: Optional[str] = None) -> str:
+        """
+        Take an online point-in-time copy of the SQLite database.
+        
+        In WAL mode the copy runs in a single backup step: it only holds a
+        read snapshot, so writers are never blocked, while a chunked copy
+        restarts whenever another connection writes between steps. For
+        rollback-journal databases the copy runs in chunks of
+        ``snapshot_pages_per_step`` pages, sleeping between steps so that
+        live submits are never locked out for the whole copy.
+        
+        Args:
+            db: Database session
+            target_path: Snapshot file path, defaults to a timestamped file in ``snapshot_dir``
+            
+        Returns:
+            Path of the written snapshot file
+        """
+        if db.get_bind().dialect.name != "sqlite":
+            raise ValueError("Online snapshots are only supported for SQLite databases")
+        
+        if target_path is None:
+            os.makedirs(settings.snapshot_dir, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            target_path = os.path.join(settings.snapshot_dir, f"leaderboard-{stamp}.db")
+        
+        # Reuse the session's connection; the writer pool holds only one
+        source = db.connection().connection.driver_connection
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(
+                target,
+                pages=-1 if wal else settings.snapshot_pages_per_step,
+                sleep=settings.snapshot_step_sleep
+            )
+        finally:
+            target.close()
+        
+        return target_path
+    
+    @staticmethod
+    def rollover(
+        db: Session,
+        season: str,
+        snapshot_path: Optional[str] = None,
+        take_snapshot: bool = True
+    ) -> SeasonRolloverResponse:
+        """
+        End the current season and start a fresh one.
+        
+        Final standings (best score per player) are read without taking
+        the write lock. A single short write transaction then stores them
+        in the archive board and removes the live records they were
+        computed from. Records submitted after the standings were read are
+        kept for the new season. The write lock is held for one archive
+        row per player plus a primary-key range delete, so live submits
+        wait roughly as long as the insert/delete takes (see README).
+        
+        Args:
+            db: Database session
+            season: Name of the season being archived
+            snapshot_path: Optional snapshot file path
+            take_snapshot: Whether to take a full database snapshot first
+            
+        Returns:
+            SeasonRolloverResponse with archive statistics
+        """
+        exists = db.query(SeasonArchive.id).filter(
+            SeasonArchive.season == season
+        ).first()
+        if exists is not None:
+            raise ValueError(f"Season '{season}' is already archived")
+        
+        if take_snapshot:
+            snapshot_path = SeasonService.snapshot(db, snapshot_path)
+        
+        # Freeze the set of records belonging to the ending season and read
+        # the final standings; plain reads never block live submits
+        last_id = db.query(func.max(Leaderboard.id)).scalar() or 0
+        best = best_records(db, last_id=last_id)
+        standings = [
+            {
+                "season": season,
+                "rank": row.rank,
+                "player_id": row.player_id,
+                "score": row.score,
+                "timestamp": row.timestamp
+            }
+            for row in db.execute(select(
+                # Competition ranking, as for live ranks
+                func.rank().over(order_by=desc(best.c.score)).label('rank'),
+                best.c.player_id,
+                best.c.score,
+                best.c.timestamp
+            ))
+        ]
+        db.rollback()
+        
+        # Short write transaction: bulk insert, keyed delete and a rebuild
+        # over the records submitted since last_id
+        try:
+            if standings:
+                db.execute(insert(SeasonArchive), standings)
+            deleted = db.query(Leaderboard).filter(
+                Leaderboard.id <= last_id
+            ).delete(synchronize_session=False)
+            LeaderboardService.rebuild_player_best(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        return SeasonRolloverResponse(
+            season=season,
+            archived_players=len(standings),
+            deleted_records=deleted,
+            snapshot_path=snapshot_path
+        )
+    
+    @staticmethod
+    def season_exists(db: Session, season: str) -> bool:
+        """Check whether a season has been archived."""
+        return db.query(SeasonArchive.id).filter(
+            SeasonArchive.season == season
+        ).first() is not None
+    
+    @staticmethod
+    def get_leaderboard(
+        db: Session,
+        season: str,
+        limit: int = 50,
+        offset: int = 0
+    ) -> LeaderboardResponse:
+        """
+        Get an archived season's leaderboard list.
+        
+        Args:
+            db: Database session
+            season: Archived season name
+            limit: Number of records to return
+            offset: Offset for pagination
+            
+        Returns:
+            LeaderboardResponse with archived entries
+        """
+        query = db.query(SeasonArchive).filter(SeasonArchive.season == season)
+        total = query.count()
+        results = query.order_by(
+            SeasonArchive.rank, SeasonArchive.timestamp
+        ).offset(offset).limit(limit).all()
+        
+        entries = [
+            LeaderboardEntry(
+                rank=row.rank,
+                player_id=row.player_id,
+                score=row.score,
+                timestamp=row.timestamp
+            )
+            for row in results
+        ]
+        
+        return LeaderboardResponse(total=total, entries=entries)
+    
+    @staticmethod
+    def get_player_rank(
+        db: Session,
+        season: str,
+        player_id: str
+    ) -> Optional[PlayerRankResponse]:
+        """
+        Get a player's final standing in an archived season.
+        
+        Args:
+            db: Database session
+            season: Archived season name
+            player_id: Player ID
+            
+        Returns:
+            PlayerRankResponse or None if player not found
+        """
+        row = db.query(SeasonArchive).filter(
+            SeasonArchive.season == season,
+            SeasonArchive.player_id == player_id
+        ).first()
+        
+        if row is None:
+            return None
+        
+        total_players = db.query(func.count(SeasonArchive.id)).filter(
+            SeasonArchive.season == season
+        ).scalar()
+        
+        return PlayerRankResponse(
+            player_id=player_id,
+            rank=row.rank,
+            score=row.score,
+            timestamp=row.timestamp,
+            total_players=total_players
+        )
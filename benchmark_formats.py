@@ -0,0 +1,66 @@
+"""Compare JSON and packed binary response size and encoding latency.
+
+Usage: python benchmark_formats.py
+"""
+import gzip
+import timeit
+
+from app.schemas.leaderboard import (
+    APIResponse,
+    LeaderboardEntry,
+    LeaderboardResponse,
+    PlayerRankEntry,
+    PlayerRanksResponse
+)
+from app.schemas.packed import encode
+
+ITERATIONS = 2000
+
+
+def build_payloads():
+    """Build representative response payloads."""
+    page = LeaderboardResponse(
+        total=150000,
+        entries=[
+            LeaderboardEntry(
+                rank=i + 1,
+                player_id=f"player_{100000 + i * 37}",
+                score=2_000_000 - i * 113,
+                timestamp=1701936000 + i * 61
+            )
+            for i in range(100)
+        ]
+    )
+    ranks = PlayerRanksResponse(
+        total_players=150000,
+        players=[
+            PlayerRankEntry(
+                player_id=f"player_{200000 + i * 41}",
+                rank=1000 + i * 17,
+                score=900_000 - i * 97,
+                timestamp=1701936000 + i * 59
+            )
+            for i in range(190)
+        ],
+        not_found=[f"player_{900000 + i}" for i in range(10)]
+    )
+    return {"leaderboard (100 entries)": page, "player ranks (200 ids)": ranks}
+
+
+def benchmark():
+    """Print size and encoding latency for each format."""
+    print(f"{'payload':<28}{'format':<8}{'bytes':>8}{'gzip':>8}{'encode us':>12}")
+    print("-" * 64)
+    for name, data in build_payloads().items():
+        formats = {
+            "json": lambda: APIResponse(code=0, message="success", data=data).model_dump_json().encode(),
+            "packed": lambda: encode(data),
+        }
+        for fmt, func in formats.items():
+            body = func()
+            seconds = timeit.timeit(func, number=ITERATIONS) / ITERATIONS
+            print(f"{name:<28}{fmt:<8}{len(body):>8}{len(gzip.compress(body)):>8}{seconds * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -22,6 +22,7 @@
 from sqlalchemy import create_engine, or_
 from sqlalchemy.orm import sessionmaker
 from app.models.leaderboard import Leaderboard
+from app.services.leaderboard import LeaderboardService
 from app.config import settings
 
 # ============================================
@@ -140,6 +141,8 @@ def clear_scores():
         
         # 执行删除
         deleted_count = query.delete(synchronize_session=False)
+        # 重建玩家最高分缓存
+        LeaderboardService.rebuild_player_best(db)
         db.commit()
         
         print(f"\n✅ 成功删除 {deleted_count} 条记录")
@@ -1,9 +1,13 @@
 """Game Leaderboard Server - Main Application Entry."""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.config import settings
-from app.database import init_db
+from app.database import ReadSessionLocal, SessionLocal, WorkerSessionLocal, init_db
+from app.metrics import counters
+from app.services.anticheat import pipeline
+from app.services.leaderboard import LeaderboardService
 from app.api.leaderboard import router as leaderboard_router
 
 # Create FastAPI application
@@ -22,6 +26,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
 # Register routers
 app.include_router(leaderboard_router, prefix=settings.api_prefix)
 
@@ -30,6 +37,19 @@ app.include_router(leaderboard_router, prefix=settings.api_prefix)
 async def startup_event():
     """Initialize database on startup."""
     init_db()
+    db = SessionLocal()
+    try:
+        LeaderboardService.sync_player_best(db)
+    finally:
+        db.close()
+    if settings.anticheat_enabled:
+        pipeline.start(WorkerSessionLocal, ReadSessionLocal)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers on shutdown."""
+    pipeline.stop()
 
 
 @app.get("/")
@@ -48,6 +68,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process counters for this worker."""
+    return counters.snapshot()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
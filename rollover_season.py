@@ -0,0 +1,81 @@
+"""赛季结算脚本。
+
+该脚本用于在服务器运行期间结束当前赛季，无需停机：
+1. 使用 SQLite 备份 API 分块在线拷贝数据库快照（不阻塞实时提交）
+2. 将当前赛季的最终排名冻结到只读的归档排行榜（每个玩家一行）
+3. 清空当前赛季的成绩记录，开始新赛季
+
+归档后的赛季可以通过现有接口的 season 参数查询：
+    GET /api/leaderboard?season=2024-S1
+    GET /api/leaderboard/player/{player_id}?season=2024-S1
+
+使用方法：
+1. 在 SEASON_NAME 中指定要归档的赛季名称
+2. 运行脚本：python rollover_season.py
+"""
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import engine, init_db
+from app.services.season import SeasonService
+
+# ============================================
+# 配置区域
+# ============================================
+# 要归档的赛季名称（不能与已归档的赛季重名）
+SEASON_NAME = ""
+
+# 是否在结算前拍摄完整数据库快照
+TAKE_SNAPSHOT = True
+
+# 是否需要确认（设为False则直接结算，不询问）
+REQUIRE_CONFIRMATION = True
+
+# ============================================
+
+
+def rollover_season():
+    """结算当前赛季并开始新赛季。"""
+    
+    if not SEASON_NAME:
+        print("❌ 错误：SEASON_NAME 为空，请先配置要归档的赛季名称")
+        return
+    
+    init_db()
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    
+    try:
+        if SeasonService.season_exists(db, SEASON_NAME):
+            print(f"❌ 错误：赛季 {SEASON_NAME} 已归档")
+            return
+        
+        if REQUIRE_CONFIRMATION:
+            confirmation = input(f"\n确认结算赛季 {SEASON_NAME} 并清空当前成绩吗? (yes/no): ")
+            if confirmation.lower() not in ['yes', 'y', '是']:
+                print("❌ 操作已取消")
+                return
+        
+        result = SeasonService.rollover(db, SEASON_NAME, take_snapshot=TAKE_SNAPSHOT)
+        
+        if result.snapshot_path:
+            print(f"\n📦 数据库快照: {result.snapshot_path}")
+        print(f"✅ 已归档 {result.archived_players} 名玩家的最终排名")
+        print(f"✅ 已清除 {result.deleted_records} 条成绩记录，新赛季开始")
+        
+    except Exception as e:
+        print(f"\n❌ 错误：{e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("赛季结算脚本")
+    print("=" * 80)
+    print(f"\n赛季名称: {SEASON_NAME or '(未配置)'}")
+    print(f"拍摄快照: {'是' if TAKE_SNAPSHOT else '否'}")
+    print()
+    
+    rollover_season()
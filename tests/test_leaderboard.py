@@ -1,11 +1,29 @@
 """Test leaderboard API endpoints."""
+import os
+import sqlite3
+import struct
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 
 from main import app
-from app.database import Base, get_db
+from app.database import Base, create_read_engine, create_write_engine, get_read_db, get_write_db
+from app.config import settings
+from app.models.leaderboard import Leaderboard, PlayerBest, ScoreFlag
+from app.schemas.packed import PACKED_MEDIA_TYPE
+from app.metrics import counters
+from app.services.anticheat import ScoreCheck, ScoreOutlierCheck, Submission, SubmissionRateCheck, pipeline
+from app.services.leaderboard import _upsert_player_best, _upsert_player_best_locked
+from app.services.season import SeasonService
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_leaderboard.db"
@@ -25,7 +43,8 @@ def override_get_db():
         db.close()
 
 
-app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_write_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 client = TestClient(app)
 
@@ -62,6 +81,80 @@ def test_submit_score():
     assert data["data"]["best_score"] == 1000
 
 
+def test_submit_non_improving_score(monkeypatch):
+    """Test that a lower score takes the fast path and keeps the best score."""
+    player_id = f"fast_path_{uuid.uuid4().hex[:8]}"
+    first = client.post("/api/leaderboard/submit", json={"player_id": player_id, "score": 800})
+    before = client.get("/metrics").json()
+    
+    response = client.post("/api/leaderboard/submit", json={"player_id": player_id, "score": 300})
+    assert response.status_code == 200
+    assert response.json()["data"] == first.json()["data"]
+    
+    monkeypatch.setattr(settings, "score_retention", "best")
+    client.post("/api/leaderboard/submit", json={"player_id": player_id, "score": 200})
+    
+    after = client.get("/metrics").json()
+    assert after["submit.fast_path"] - before.get("submit.fast_path", 0) == 2
+    assert after["submit.persist_skipped"] - before.get("submit.persist_skipped", 0) == 1
+    
+    db = TestingSessionLocal()
+    try:
+        scores = {row.score for row in db.query(Leaderboard).filter(Leaderboard.player_id == player_id)}
+    finally:
+        db.close()
+    assert scores == {800, 300}
+
+
+def test_read_engine_is_read_only(tmp_path):
+    """Test that the reader engine opens SQLite read-only."""
+    url = f"sqlite:///{tmp_path / 'readonly.db'}"
+    write_engine = create_write_engine(url)
+    read_engine = create_read_engine(url)
+    try:
+        Base.metadata.create_all(bind=write_engine)
+        with write_engine.begin() as conn:
+            conn.execute(text("INSERT INTO leaderboard (player_id, score, timestamp, created_at) VALUES ('ro', 1, 1, '2024-01-01')"))
+        
+        with read_engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM leaderboard")).scalar() == 1
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            with pytest.raises(OperationalError, match="readonly database"):
+                conn.execute(text("DELETE FROM leaderboard"))
+    finally:
+        read_engine.dispose()
+        write_engine.dispose()
+
+
+def test_fast_path_rank_after_overtake():
+    """Test that the fast path reports the current rank after being overtaken."""
+    prefix = uuid.uuid4().hex[:8]
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_a", "score": 100})
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_b", "score": 200})
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_c", "score": 300})
+    
+    response = client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_a", "score": 50})
+    data = response.json()["data"]
+    assert data["best_score"] == 100
+    assert data["rank"] == client.get(f"/api/leaderboard/player/{prefix}_a").json()["data"]["rank"]
+
+
+@pytest.mark.parametrize("upsert", [_upsert_player_best, _upsert_player_best_locked])
+def test_upsert_player_best_never_lowers(upsert):
+    """Test that the best score upsert only ever raises the stored best."""
+    player_id = f"upsert_{uuid.uuid4().hex[:8]}"
+    db = TestingSessionLocal()
+    try:
+        assert upsert(db, player_id, 500, 1000) == 500
+        assert upsert(db, player_id, 300, 2000) == 500
+        assert upsert(db, player_id, 700, 3000) == 700
+        best = db.get(PlayerBest, player_id)
+        assert (best.score, best.timestamp) == (700, 3000)
+    finally:
+        db.rollback()
+        db.close()
+
+
 def test_get_leaderboard():
     """Test get leaderboard endpoint."""
     # Submit a few scores first
@@ -94,3 +187,401 @@ def test_get_player_rank_not_found():
     """Test get player rank for non-existent player."""
     response = client.get("/api/leaderboard/player/nonexistent_player")
     assert response.status_code == 404
+
+
+def test_get_player_ranks():
+    """Test batch player rank lookup."""
+    prefix = uuid.uuid4().hex[:8]
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_a", "score": 4100, "timestamp": 1000})
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_a", "score": 4000, "timestamp": 2000})
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_b", "score": 4200})
+    
+    response = client.post(
+        "/api/leaderboard/players/ranks",
+        json={"player_ids": [f"{prefix}_a", f"{prefix}_missing", f"{prefix}_b", f"{prefix}_a"]}
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [p["player_id"] for p in data["players"]] == [f"{prefix}_a", f"{prefix}_b"]
+    assert data["not_found"] == [f"{prefix}_missing"]
+    
+    for entry in data["players"]:
+        single = client.get(f"/api/leaderboard/player/{entry['player_id']}").json()["data"]
+        assert entry["rank"] == single["rank"]
+        assert entry["score"] == single["score"]
+        assert entry["timestamp"] == single["timestamp"]
+        assert data["total_players"] == single["total_players"]
+    
+    # Timestamp of the best-score record, not the latest submission
+    assert data["players"][0]["timestamp"] == 1000
+    
+    response = client.post("/api/leaderboard/players/ranks", json={"player_ids": []})
+    assert response.status_code == 422
+    
+    # Same per-ID limits as submissions, so the packed string table never overflows
+    for bad_id in ["", "x" * 256, "x" * 70000]:
+        response = client.post(
+            "/api/leaderboard/players/ranks",
+            json={"player_ids": [bad_id]},
+            headers={"Accept": PACKED_MEDIA_TYPE}
+        )
+        assert response.status_code == 422
+
+
+def test_anticheat_flags_excluded_from_rankings():
+    """Test that flagged records are excluded from leaderboard and ranks."""
+    player_id = f"cheater_{uuid.uuid4().hex[:8]}"
+    client.post("/api/leaderboard/submit", json={"player_id": player_id, "score": 100, "timestamp": 1701936000})
+    client.post("/api/leaderboard/submit", json={"player_id": player_id, "score": 999999, "timestamp": 4102444800})
+    
+    read_db = TestingSessionLocal()
+    write_db = TestingSessionLocal()
+    try:
+        batch = [
+            Submission(row.id, row.player_id, row.score, row.timestamp)
+            for row in read_db.query(Leaderboard).filter(Leaderboard.player_id == player_id)
+        ]
+        flags = pipeline.process_batch(read_db, write_db, batch)
+    finally:
+        read_db.close()
+        write_db.close()
+    assert list(flags.values()) == ["future_timestamp"]
+    
+    # Only the flagged player's best is recomputed
+    db = TestingSessionLocal()
+    try:
+        assert db.get(PlayerBest, player_id).score == 100
+    finally:
+        db.close()
+    
+    response = client.get(f"/api/leaderboard/player/{player_id}")
+    assert response.json()["data"]["score"] == 100
+    
+    response = client.post("/api/leaderboard/players/ranks", json={"player_ids": [player_id]})
+    assert response.json()["data"]["players"][0]["score"] == 100
+    
+    response = client.get(f"/api/leaderboard?limit={settings.max_page_limit}")
+    assert all(e["score"] != 999999 for e in response.json()["data"]["entries"])
+
+
+def test_anticheat_ignores_reused_record_id():
+    """Test that a stale submission does not flag a different record with its ID."""
+    player_id = f"honest_{uuid.uuid4().hex[:8]}"
+    client.post("/api/leaderboard/submit", json={"player_id": player_id, "score": 500, "timestamp": 1701936000})
+    
+    read_db = TestingSessionLocal()
+    write_db = TestingSessionLocal()
+    try:
+        record = read_db.query(Leaderboard).filter(Leaderboard.player_id == player_id).one()
+        # Queued before a rollover, for a record that used to have this ID
+        stale = Submission(record.id, "someone_else", 999999, 4102444800)
+        flags = pipeline.process_batch(read_db, write_db, [stale])
+    finally:
+        read_db.close()
+        write_db.close()
+    assert list(flags.values()) == ["future_timestamp"]
+    
+    response = client.get(f"/api/leaderboard/player/{player_id}")
+    assert response.json()["data"]["score"] == 500
+
+
+def test_anticheat_pipeline_flags_submitted_score(tmp_path):
+    """Test a submission flowing through the running pipeline into a flag."""
+    url = f"sqlite:///{tmp_path / 'pipeline.db'}"
+    write_engine = create_write_engine(url)
+    read_engine = create_read_engine(url)
+    worker_engine = create_write_engine(url)
+    Base.metadata.create_all(bind=write_engine)
+    WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    WorkerSession = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+    
+    def override(factory):
+        def get_db():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        return get_db
+    
+    app.dependency_overrides[get_write_db] = override(WriteSession)
+    app.dependency_overrides[get_read_db] = override(ReadSession)
+    pipeline.start(WorkerSession, ReadSession)
+    try:
+        client.post("/api/leaderboard/submit", json={"player_id": "pipe_honest", "score": 100, "timestamp": 1701936000})
+        response = client.post("/api/leaderboard/submit", json={"player_id": "pipe_cheater", "score": 999999, "timestamp": 4102444800})
+        assert response.json()["data"]["rank"] == 1
+    finally:
+        # Stopping drains the queue
+        pipeline.stop()
+        app.dependency_overrides[get_write_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+    
+    db = WriteSession()
+    try:
+        flags = db.query(Leaderboard.player_id, ScoreFlag.reason).join(
+            ScoreFlag, ScoreFlag.record_id == Leaderboard.id
+        ).all()
+        assert [tuple(row) for row in flags] == [("pipe_cheater", "future_timestamp")]
+        assert db.get(PlayerBest, "pipe_cheater") is None
+        assert db.get(PlayerBest, "pipe_honest").score == 100
+    finally:
+        db.close()
+        worker_engine.dispose()
+        read_engine.dispose()
+        write_engine.dispose()
+
+
+def test_anticheat_pipeline_drops_when_full(monkeypatch):
+    """Test that enqueueing never blocks a request once the queue is full."""
+    monkeypatch.setattr(settings, "anticheat_queue_size", 1)
+    monkeypatch.setattr(settings, "anticheat_workers", 0)
+    dropped = counters.snapshot().get("anticheat.dropped", 0)
+    pipeline.start(TestingSessionLocal, TestingSessionLocal)
+    try:
+        pipeline.enqueue(Submission(1, "full", 1, 1))
+        pipeline.enqueue(Submission(2, "full", 1, 1))
+    finally:
+        pipeline.stop()
+    assert counters.snapshot()["anticheat.dropped"] == dropped + 1
+
+
+@pytest.fixture
+def check_db(tmp_path):
+    """Empty database session for anti-cheat check tests."""
+    check_engine = create_write_engine(f"sqlite:///{tmp_path / 'checks.db'}")
+    Base.metadata.create_all(bind=check_engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=check_engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        check_engine.dispose()
+
+
+def test_score_outlier_check(check_db, monkeypatch):
+    """Test that only scores far above the recent distribution are flagged."""
+    monkeypatch.setattr(settings, "anticheat_outlier_min_samples", 50)
+    monkeypatch.setattr(settings, "anticheat_outlier_threshold", 10.0)
+    check = ScoreOutlierCheck()
+    batch = [Submission(1001, "steady", 1100, 1), Submission(1002, "cheater", 50000, 1)]
+    
+    # Too few samples to judge
+    check_db.add_all(Leaderboard(player_id=f"p{i}", score=1000 + i, timestamp=1) for i in range(10))
+    check_db.commit()
+    assert check.run(check_db, batch) == {}
+    
+    # Median 1029.5, MAD 15: the limit is about 1252
+    check_db.add_all(Leaderboard(player_id=f"p{i}", score=1000 + i, timestamp=1) for i in range(10, 60))
+    check_db.commit()
+    assert check.run(check_db, batch) == {1002: "score_outlier"}
+    
+    # Flagged records do not shift the distribution
+    cheats = [Leaderboard(player_id="cheater", score=50000, timestamp=1) for _ in range(100)]
+    check_db.add_all(cheats)
+    check_db.flush()
+    check_db.add_all(ScoreFlag(record_id=row.id, reason="score_outlier") for row in cheats)
+    check_db.commit()
+    assert check.run(check_db, batch) == {1002: "score_outlier"}
+
+
+def test_submission_rate_check(check_db, monkeypatch):
+    """Test that only players over the rate limit within the window are flagged."""
+    monkeypatch.setattr(settings, "anticheat_rate_window", 60)
+    monkeypatch.setattr(settings, "anticheat_rate_limit", 30)
+    now = datetime.utcnow()
+    hour_ago = now - timedelta(hours=1)
+    check_db.add_all(Leaderboard(player_id="spammer", score=1, timestamp=1, created_at=now) for _ in range(31))
+    check_db.add_all(Leaderboard(player_id="at_limit", score=1, timestamp=1, created_at=now) for _ in range(30))
+    check_db.add_all(Leaderboard(player_id="veteran", score=1, timestamp=1, created_at=hour_ago) for _ in range(100))
+    check_db.commit()
+    
+    batch = [
+        Submission(1, "spammer", 1, 1),
+        Submission(2, "at_limit", 1, 1),
+        Submission(3, "veteran", 1, 1),
+        Submission(4, "newcomer", 1, 1)
+    ]
+    assert SubmissionRateCheck().run(check_db, batch) == {1: "submission_rate"}
+
+
+def decode_packed(body):
+    """Decode a packed response body, mirroring the GDScript decoder."""
+    magic, version, payload_type = struct.unpack_from("<4sBB", body, 0)
+    assert (magic, version) == (b"CTLB", 1)
+    offset = 6
+    
+    def read(fmt):
+        nonlocal offset
+        values = struct.unpack_from(fmt, body, offset)
+        offset += struct.calcsize(fmt)
+        return values
+    
+    strings = []
+    for _ in range(read("<H")[0]):
+        (length,) = read("<H")
+        strings.append(body[offset:offset + length].decode("utf-8"))
+        offset += length
+    
+    def read_entry():
+        rank, player, score, timestamp = read("<IHqq")
+        return {"rank": rank, "player_id": strings[player], "score": score, "timestamp": timestamp}
+    
+    if payload_type == 1:
+        rank, best_score = read("<Iq")
+        data = {"rank": rank, "best_score": best_score}
+    elif payload_type == 2:
+        total, count = read("<IH")
+        data = {"total": total, "entries": [read_entry() for _ in range(count)]}
+    elif payload_type == 3:
+        data = read_entry()
+        data["total_players"] = read("<I")[0]
+    else:
+        total_players, count = read("<IH")
+        players = [read_entry() for _ in range(count)]
+        (missing,) = read("<H")
+        data = {
+            "total_players": total_players,
+            "players": players,
+            "not_found": [strings[read("<H")[0]] for _ in range(missing)]
+        }
+    
+    assert offset == len(body)
+    return payload_type, data
+
+
+def test_packed_round_trip():
+    """Test that every packed payload decodes to the JSON response data."""
+    packed = {"Accept": PACKED_MEDIA_TYPE}
+    prefix = uuid.uuid4().hex[:8]
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_a", "score": 5000, "timestamp": 1000})
+    client.post("/api/leaderboard/submit", json={"player_id": f"{prefix}_b", "score": 6000, "timestamp": 2000})
+    
+    # Non-improving submits return the same result in both formats
+    submit = {"player_id": f"{prefix}_a", "score": 10, "timestamp": 3000}
+    response = client.post("/api/leaderboard/submit", json=submit, headers=packed)
+    assert response.headers["content-type"] == PACKED_MEDIA_TYPE
+    assert decode_packed(response.content) == (1, client.post("/api/leaderboard/submit", json=submit).json()["data"])
+    
+    url = "/api/leaderboard?limit=5"
+    assert decode_packed(client.get(url, headers=packed).content) == (2, client.get(url).json()["data"])
+    
+    url = f"/api/leaderboard/player/{prefix}_a"
+    assert decode_packed(client.get(url, headers=packed).content) == (3, client.get(url).json()["data"])
+    
+    url = "/api/leaderboard/players/ranks"
+    body = {"player_ids": [f"{prefix}_b", f"{prefix}_missing", f"{prefix}_a"]}
+    payload_type, data = decode_packed(client.post(url, json=body, headers=packed).content)
+    assert payload_type == 4
+    assert data == client.post(url, json=body).json()["data"]
+    assert data["not_found"] == [f"{prefix}_missing"]
+
+
+def test_packed_content_negotiation():
+    """Test Accept q-values and the Vary header."""
+    cases = {
+        PACKED_MEDIA_TYPE: PACKED_MEDIA_TYPE,
+        f"application/json, {PACKED_MEDIA_TYPE};q=0": "application/json",
+        f"application/json;q=0.5, {PACKED_MEDIA_TYPE}": PACKED_MEDIA_TYPE,
+        f"{PACKED_MEDIA_TYPE};q=0.5, application/json": "application/json",
+        "*/*": "application/json",
+    }
+    for accept, expected in cases.items():
+        response = client.get("/api/leaderboard?limit=1", headers={"Accept": accept})
+        assert response.headers["content-type"] == expected, accept
+        assert "Accept" in [v.strip() for v in response.headers["vary"].split(",")]
+
+
+def test_score_check_is_abstract():
+    """Test that checks must implement run."""
+    with pytest.raises(TypeError):
+        ScoreCheck()
+
+
+def test_snapshot_during_concurrent_writes(tmp_path):
+    """Test that a WAL snapshot finishes while another process keeps writing."""
+    url = f"sqlite:///{tmp_path / 'live.db'}"
+    write_engine = create_write_engine(url)
+    Base.metadata.create_all(bind=write_engine)
+    with write_engine.begin() as conn:
+        conn.execute(
+            Leaderboard.__table__.insert(),
+            [{"player_id": f"p{i}", "score": i, "timestamp": i, "created_at": datetime(2024, 1, 1)} for i in range(20000)]
+        )
+    
+    writer = subprocess.Popen([sys.executable, "-c", (
+        "import sqlite3, time\n"
+        f"db = sqlite3.connect({str(tmp_path / 'live.db')!r})\n"
+        "while True:\n"
+        "    db.execute(\"INSERT INTO leaderboard (player_id, score, timestamp, created_at) VALUES ('w', 1, 1, '2024-01-01')\")\n"
+        "    db.commit()\n"
+        "    time.sleep(0.001)\n"
+    )])
+    db = sessionmaker(bind=write_engine)()
+    snapshot_thread = threading.Thread(
+        target=SeasonService.snapshot, args=(db, str(tmp_path / "snapshot.db")), daemon=True
+    )
+    try:
+        time.sleep(0.2)
+        snapshot_thread.start()
+        snapshot_thread.join(timeout=10)
+        assert not snapshot_thread.is_alive()
+    finally:
+        writer.kill()
+        writer.wait()
+        db.close()
+        write_engine.dispose()
+    
+    snapshot = sqlite3.connect(tmp_path / "snapshot.db")
+    try:
+        assert snapshot.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert snapshot.execute("SELECT count(*) FROM leaderboard WHERE player_id != 'w'").fetchone()[0] == 20000
+    finally:
+        snapshot.close()
+
+
+def test_season_rollover(tmp_path):
+    """Test archiving a season and querying it with the season parameter."""
+    client.post("/api/leaderboard/submit", json={"player_id": "season_player_1", "score": 500})
+    client.post("/api/leaderboard/submit", json={"player_id": "season_player_3", "score": 700})
+    client.post("/api/leaderboard/submit", json={"player_id": "season_player_1", "score": 900})
+    client.post("/api/leaderboard/submit", json={"player_id": "season_player_2", "score": 700})
+    
+    season = f"test-season-{uuid.uuid4().hex[:8]}"
+    db = TestingSessionLocal()
+    try:
+        result = SeasonService.rollover(db, season, snapshot_path=str(tmp_path / "snapshot.db"))
+        assert result.archived_players >= 2
+        assert os.path.exists(result.snapshot_path)
+        with pytest.raises(ValueError):
+            SeasonService.rollover(db, season, take_snapshot=False)
+    finally:
+        db.close()
+    
+    # Live board starts fresh
+    response = client.get("/api/leaderboard/player/season_player_1")
+    assert response.status_code == 404
+    
+    response = client.get(f"/api/leaderboard?season={season}")
+    assert response.status_code == 200
+    entries = response.json()["data"]["entries"]
+    ranks = [e["rank"] for e in entries]
+    assert ranks == sorted(ranks)
+    assert len({e["player_id"] for e in entries}) == len(entries)
+    
+    response = client.get(f"/api/leaderboard/player/season_player_1?season={season}")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["score"] == 900
+    assert data["total_players"] == result.archived_players
+    
+    # Tied scores share a competition rank, as live ranks do
+    tied = [client.get(f"/api/leaderboard/player/season_player_{i}?season={season}").json()["data"] for i in (2, 3)]
+    assert tied[0]["rank"] == tied[1]["rank"]
+    
+    response = client.get(f"/api/leaderboard?season={season}&time_range=daily")
+    assert response.status_code == 400
+    
+    response = client.get("/api/leaderboard?season=missing-season")
+    assert response.status_code == 404